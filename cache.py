@@ -0,0 +1,256 @@
+import os
+import shlex
+import subprocess
+
+import manifest
+
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3  # 5 GiB
+
+# Package-manager executables recognised when rewriting commands for prefetch
+PIP_NAMES = ("pip", "pip3")
+APT_NAMES = ("apt", "apt-get")
+
+# Install options whose value is the following token, so it is not mistaken for a package
+OPTIONS_WITH_VALUE = ("-r", "--requirement", "-c", "--constraint", "-i", "--index-url",
+                      "--extra-index-url", "-t", "--target", "--registry", "--prefix")
+
+# Environment variables holding a default mirror URL for each manager
+MIRROR_VARS = {
+    "pip": "HABITAT_PIP_MIRROR",
+    "npm": "HABITAT_NPM_MIRROR",
+    "brew": "HABITAT_BREW_MIRROR",
+}
+
+
+def default_cache_root():
+    """Returns HABITAT_CACHE_DIR, or habitat/ under the user's cache directory."""
+    if os.environ.get("HABITAT_CACHE_DIR"):
+        return os.environ["HABITAT_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "habitat")
+
+
+def parse_mirror(spec):
+    """Parses a 'manager=url' mirror option into a (manager, url) pair."""
+    manager, sep, url = spec.partition("=")
+    manager = manager.strip().lower()
+    if not sep or not url.strip():
+        raise ValueError(f"Mirror must be MANAGER=URL, got '{spec}'")
+    if manager not in MIRROR_VARS:
+        raise ValueError(f"Unknown mirror manager '{manager}' (expected one of: {', '.join(MIRROR_VARS)})")
+    return manager, url.strip()
+
+
+class ArtifactCache:
+    """
+    A local download cache shared by every package manager a cart run uses.
+
+    env() returns the variables that point pip, npm, Homebrew and apt at
+    directories under root, so repeated installs are served from local disk.
+    With offline=True the managers are told not to reach the network at all,
+    which only works once the cache has been filled by prefetch().
+
+    sudo drops these variables, so 'sudo ...' steps bypass the cache unless
+    preserve_sudo_env is set (or HABITAT_SUDO_PRESERVE_ENV=1). It is off by
+    default because restricted sudoers rules refuse --preserve-env.
+
+    mirrors maps "pip", "npm" and "brew" to a registry URL; managers not
+    listed fall back to HABITAT_PIP_MIRROR / HABITAT_NPM_MIRROR /
+    HABITAT_BREW_MIRROR.
+    """
+
+    def __init__(self, root=None, max_bytes=None, offline=None, mirrors=None, preserve_sudo_env=None):
+        self.root = os.path.abspath(root or default_cache_root())
+        if max_bytes is None:
+            max_mb = os.environ.get("HABITAT_CACHE_MAX_MB")
+            max_bytes = int(max_mb) * 1024 ** 2 if max_mb else DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+        if offline is None:
+            offline = os.environ.get("HABITAT_OFFLINE", "") not in ("", "0")
+        self.offline = offline
+        if preserve_sudo_env is None:
+            preserve_sudo_env = os.environ.get("HABITAT_SUDO_PRESERVE_ENV", "") not in ("", "0")
+        self.preserve_sudo_env = preserve_sudo_env
+        # Optional mirror URLs keyed by manager, e.g. {"pip": "...", "npm": "..."}
+        self.mirrors = {
+            manager: os.environ[var] for manager, var in MIRROR_VARS.items() if os.environ.get(var)
+        }
+        self.mirrors.update(mirrors or {})
+
+        self.pip_dir = os.path.join(self.root, "pip")
+        self.wheelhouse = os.path.join(self.root, "wheelhouse")
+        self.npm_dir = os.path.join(self.root, "npm")
+        self.brew_dir = os.path.join(self.root, "brew")
+        self.apt_dir = os.path.join(self.root, "apt", "archives")
+        self.apt_conf = os.path.join(self.root, "apt", "apt.conf")
+
+        # Directories written by the user's own package managers and trimmed by
+        # prune(). apt runs as root and leaves root-owned .debs, so its archive
+        # is left to apt-get autoclean; other files under root (such as the
+        # generation cache) are never touched.
+        self.managed_dirs = (self.pip_dir, self.wheelhouse, self.npm_dir, self.brew_dir)
+
+    def ensure_dirs(self):
+        for path in (self.pip_dir, self.wheelhouse, self.npm_dir, self.brew_dir,
+                     os.path.join(self.apt_dir, "partial")):
+            os.makedirs(path, exist_ok=True)
+        if not os.path.exists(self.apt_conf):
+            with open(self.apt_conf, "w") as file:
+                file.write(f'Dir::Cache::Archives "{self.apt_dir}/";\n')
+
+    def env(self, base=None):
+        """
+        Returns a copy of base (default os.environ) with the cache and mirror
+        settings for each package manager added.
+        """
+        self.ensure_dirs()
+        env = dict(os.environ if base is None else base)
+        env.update({
+            "PIP_CACHE_DIR": self.pip_dir,
+            "PIP_FIND_LINKS": self.wheelhouse,
+            "npm_config_cache": self.npm_dir,
+            "HOMEBREW_CACHE": self.brew_dir,
+            "APT_CONFIG": self.apt_conf,
+        })
+
+        if self.mirrors.get("pip"):
+            env["PIP_INDEX_URL"] = self.mirrors["pip"]
+        if self.mirrors.get("npm"):
+            env["npm_config_registry"] = self.mirrors["npm"]
+        if self.mirrors.get("brew"):
+            env["HOMEBREW_BOTTLE_DOMAIN"] = self.mirrors["brew"]
+
+        if self.offline:
+            env["PIP_NO_INDEX"] = "1"
+            env["npm_config_offline"] = "true"
+            env["HOMEBREW_NO_AUTO_UPDATE"] = "1"
+            env["HOMEBREW_NO_INSTALL_FROM_API"] = "1"
+        return env
+
+    def cache_keys(self):
+        """Names of the variables env() sets, for forwarding through sudo."""
+        return sorted(set(self.env({})))
+
+    def wrap_command(self, command):
+        """
+        Rewrites 'sudo ...' steps to keep the cache variables when
+        preserve_sudo_env is set; otherwise returns command unchanged.
+        """
+        if not self.preserve_sudo_env:
+            return command
+        steps = manifest.split_steps(command)
+        if not any(step.startswith("sudo ") for step in steps):
+            return command
+        preserve = "sudo --preserve-env=" + ",".join(self.cache_keys()) + " "
+        return " && ".join(
+            preserve + step[len("sudo "):] if step.startswith("sudo ") else step for step in steps
+        )
+
+    def prefetch_commands(self, command):
+        """
+        Translates the install steps of a cart command into download-only
+        commands that fill the cache. Steps that are not recognised installs
+        are skipped.
+        """
+        prefetch = []
+        for step in manifest.split_steps(command):
+            try:
+                tokens = shlex.split(step)
+            except ValueError:
+                continue
+
+            sudo = []
+            if tokens and tokens[0] == "sudo":
+                sudo, tokens = ["sudo"], tokens[1:]
+                if self.preserve_sudo_env:
+                    sudo.append("--preserve-env=" + ",".join(self.cache_keys()))
+            if tokens[:3] in (["python", "-m", "pip"], ["python3", "-m", "pip"]):
+                tokens = ["pip"] + tokens[3:]
+            if len(tokens) < 3 or tokens[1] != "install":
+                continue
+
+            manager, args = tokens[0], tokens[2:]
+            packages = []
+            requirements = []
+            skip_next = False
+            for arg, next_arg in zip(args, args[1:] + [None]):
+                if skip_next:
+                    skip_next = False
+                elif arg in OPTIONS_WITH_VALUE:
+                    skip_next = True
+                    if arg in ("-r", "--requirement") and next_arg:
+                        requirements += [arg, next_arg]
+                elif not arg.startswith("-"):
+                    packages.append(arg)
+
+            if manager in PIP_NAMES:
+                if packages or requirements:
+                    prefetch.append(shlex.join(
+                        [manager, "download", "--dest", self.wheelhouse] + requirements + packages
+                    ))
+            elif manager == "npm":
+                for package in packages:
+                    prefetch.append(shlex.join(["npm", "cache", "add", package]))
+            elif manager == "brew":
+                casks = ["--cask"] if "--cask" in args else []
+                if packages:
+                    prefetch.append(shlex.join(["brew", "fetch"] + casks + packages))
+            elif manager in APT_NAMES:
+                if packages:
+                    prefetch.append(shlex.join(
+                        sudo + ["apt-get", "install", "--download-only", "-y"] + packages
+                    ))
+        return prefetch
+
+    def prefetch(self, cart_items):
+        """
+        Downloads the artifacts for every item in the cart without installing
+        them, then trims the cache back under its size cap.
+        """
+        env = self.env()
+        for (name, version, command) in cart_items:
+            for prefetch_cmd in self.prefetch_commands(command or ""):
+                print(f"Prefetching for {name} v{version}: {prefetch_cmd}")
+                result = subprocess.run(prefetch_cmd, shell=True, env=env,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                if result.returncode != 0:
+                    print(f"Error prefetching for {name} v{version}: {result.stderr.decode()}")
+        self.prune()
+
+    def _entries(self):
+        for managed_dir in self.managed_dirs:
+            for dirpath, _, filenames in os.walk(managed_dir):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat
+
+    def size(self):
+        """Total bytes currently held in the pruned (pip, wheelhouse, npm, brew) caches."""
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def prune(self, max_bytes=None):
+        """
+        Deletes least-recently-used files until the cache fits in max_bytes.
+        Returns the number of bytes freed.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = list(self._entries())
+        total = sum(stat.st_size for _, stat in entries)
+        freed = 0
+
+        # Filesystems mounted noatime never update st_atime, so take whichever is newer
+        entries.sort(key=lambda entry: max(entry[1].st_atime, entry[1].st_mtime))
+        for path, stat in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= stat.st_size
+            freed += stat.st_size
+        return freed
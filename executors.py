@@ -0,0 +1,455 @@
+import os
+import shlex
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Outcome of running one cart item on one target.
+# status is one of "ok", "failed", "timeout" or "cancelled".
+ItemResult = namedtuple("ItemResult", ["name", "version", "command", "returncode", "stdout", "stderr", "status"])
+
+# How often a running command checks for cancellation
+POLL_INTERVAL = 0.1
+# Grace period between SIGTERM and SIGKILL when stopping a process group
+KILL_GRACE = 3.0
+
+
+class CommandTimeout(Exception):
+    """Raised when a command outlives its deadline; its process group has been killed."""
+
+
+class CommandCancelled(Exception):
+    """Raised when a run is cancelled mid-command; its process group has been killed."""
+
+
+def _new_group_kwargs():
+    """Popen arguments that start the child as the leader of its own process group."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _group_alive(pgid):
+    """Whether any non-zombie process is still in the process group."""
+    if os.path.isdir("/proc/self"):
+        # Zombies still count for killpg(pgid, 0), and a container's init may
+        # never reap them, so look for live members directly on Linux.
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as file:
+                    fields = file.read().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            if fields[0] != "Z" and int(fields[2]) == pgid:
+                return True
+        return False
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def kill_process_group(proc, grace=KILL_GRACE):
+    """
+    Stops proc and every child it spawned: SIGTERM to the group, then SIGKILL
+    if anything is still running after grace seconds. The group is signalled
+    even when proc itself has already exited, since its children may not have.
+    """
+    if os.name == "nt":
+        if proc.poll() is None:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        proc.poll()
+        return
+    except PermissionError:
+        # e.g. the group leader is sudo running as root; stop what we can
+        if proc.poll() is None:
+            proc.kill()
+
+    end = time.monotonic() + grace
+    while time.monotonic() < end:
+        proc.poll()  # reap the leader so it does not linger as a zombie
+        if not _group_alive(proc.pid):
+            return
+        time.sleep(0.05)
+
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    if proc.poll() is None:
+        proc.kill()
+    proc.poll()
+
+
+def _drain(proc, timeout=1.0):
+    """
+    Collects what is left in proc's pipes after a kill. Anything that escaped
+    the process group and still holds the pipes open is not waited for.
+    """
+    try:
+        proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        for pipe in (proc.stdout, proc.stderr):
+            if pipe:
+                pipe.close()
+    proc.poll()
+
+
+###################################
+# Targets
+###################################
+class Target(ABC):
+    """
+    Somewhere a cart can be installed. Subclasses decide how a shell command
+    string is launched there via argv().
+    """
+    # Whether the run environment (e.g. the artifact cache paths) applies on this target
+    local = False
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def prefix(self):
+        return f"[{self.name}] "
+
+    @abstractmethod
+    def argv(self, command):
+        """Returns what subprocess should launch to run command on this target."""
+
+    def popen_args(self, command, env=None):
+        """Keyword arguments for subprocess that launch command on this target."""
+        return {"args": self.argv(command), "env": env if self.local else None}
+
+    def run(self, command, env=None, timeout=None, cancel_event=None):
+        """
+        Runs command and returns (returncode, stdout, stderr) with decoded output.
+
+        The command gets its own process group and no stdin, so an installer
+        that prompts sees EOF instead of hanging. If timeout seconds pass or
+        cancel_event is set, the whole group is killed and CommandTimeout or
+        CommandCancelled is raised.
+        """
+        token = uuid.uuid4().hex
+        proc = subprocess.Popen(
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            **_new_group_kwargs(), **self.popen_args(self.wrap(command, token), env)
+        )
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                wait = POLL_INTERVAL if cancel_event is not None else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise CommandTimeout(f"timed out after {timeout:g}s")
+                    wait = remaining if wait is None else min(wait, remaining)
+                if cancel_event is not None and cancel_event.is_set():
+                    raise CommandCancelled("cancelled")
+                try:
+                    stdout, stderr = proc.communicate(timeout=wait)
+                    break
+                except subprocess.TimeoutExpired:
+                    continue
+        except BaseException:
+            # The single cleanup path for timeouts, cancellation and interrupts
+            # (children in their own group do not see the terminal's SIGINT).
+            self.stop(token)
+            kill_process_group(proc)
+            _drain(proc)
+            raise
+        return proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+    def wrap(self, command, token):
+        """Returns the command actually launched for one run(); token identifies that run."""
+        return command
+
+    def stop(self, token):
+        """Stops whatever the run identified by token left running on the target."""
+
+    def close(self):
+        """Releases anything held open for this target (e.g. SSH connections)."""
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class LocalTarget(Target):
+    """
+    Runs commands on this machine through the platform shell, optionally from
+    a different working directory. Several LocalTargets with distinct cwds can
+    stand in for real hosts when exercising the fan-out executor.
+    """
+    local = True
+
+    def __init__(self, name="local", cwd=None):
+        super().__init__(name)
+        self.cwd = cwd
+
+    @property
+    def prefix(self):
+        return "" if self.name == "local" else super().prefix
+
+    def argv(self, command):
+        # Handed to the platform shell as-is (shell=True in popen_args)
+        return command
+
+    def popen_args(self, command, env=None):
+        return {"args": self.argv(command), "shell": True, "cwd": self.cwd, "env": env}
+
+
+class RemoteTarget(Target):
+    """
+    A target whose commands run behind a client process (chroot, docker exec,
+    ssh). Killing the local client does not stop the remote command, so each
+    command is started as its own process group on the target, its group id
+    is written to a pidfile there, and stop() kills that group remotely.
+    argv(command) must run the shell command string on the target.
+    """
+
+    def _pidfile(self, token):
+        return f"/tmp/habitat-{token}.pid"
+
+    def wrap(self, command, token):
+        pidfile = self._pidfile(token)
+        # A background job is not a group leader, so setsid execs in place and
+        # the new session's id is $!. Without setsid only that pid can be killed.
+        script = (
+            f'if command -v setsid >/dev/null 2>&1; then setsid /bin/sh -c "$1" & '
+            f'else /bin/sh -c "$1" & fi; pid=$!; echo $pid > {pidfile}; '
+            f'wait $pid; rc=$?; rm -f {pidfile}; exit $rc'
+        )
+        return f"/bin/sh -c {shlex.quote(script)} habitat {shlex.quote(command)}"
+
+    def stop(self, token):
+        pidfile = self._pidfile(token)
+        script = (
+            f"pid=$(cat {pidfile} 2>/dev/null) || exit 0; "
+            f"kill -TERM -$pid 2>/dev/null || kill -TERM $pid 2>/dev/null; i=0; "
+            f"while kill -0 -$pid 2>/dev/null && [ $i -lt {int(KILL_GRACE * 10)} ]; do sleep 0.1; i=$((i+1)); done; "
+            f"kill -KILL -$pid 2>/dev/null || kill -KILL $pid 2>/dev/null; rm -f {pidfile}"
+        )
+        try:
+            subprocess.run(self.argv(script), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=KILL_GRACE + 30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"{self.prefix}Could not stop remote command: {e}")
+
+
+class ChrootTarget(RemoteTarget):
+    def __init__(self, path):
+        super().__init__(f"chroot:{path}")
+        self.path = path
+
+    def argv(self, command):
+        return ["chroot", self.path, "/bin/sh", "-c", command]
+
+
+class ContainerTarget(RemoteTarget):
+    """A running container, reached through `<engine> exec`."""
+
+    def __init__(self, container, engine="docker"):
+        super().__init__(f"{engine}:{container}")
+        self.container = container
+        self.engine = engine
+
+    def argv(self, command):
+        return [self.engine, "exec", self.container, "/bin/sh", "-c", command]
+
+
+class SSHTarget(RemoteTarget):
+    """
+    A remote host reached over SSH. Every command on the host reuses one
+    multiplexed master connection (ControlMaster), so only the first command
+    pays for the handshake; close() tears the master down.
+    """
+
+    def __init__(self, host, control_dir=None, persist="10m"):
+        super().__init__(f"ssh:{host}")
+        self.host = host
+        self.control_dir = control_dir or tempfile.gettempdir()
+        self.persist = persist
+
+    def ssh_options(self):
+        return [
+            "-o", "BatchMode=yes",
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={os.path.join(self.control_dir, 'habitat-ssh-%C')}",
+            "-o", f"ControlPersist={self.persist}",
+        ]
+
+    def argv(self, command):
+        return ["ssh"] + self.ssh_options() + [self.host, command]
+
+    def close(self):
+        subprocess.run(
+            ["ssh"] + self.ssh_options() + ["-O", "exit", self.host],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+
+def parse_target(spec):
+    """
+    Builds a Target from a command-line spec:
+      local, local:NAME[=CWD], chroot:PATH, docker:CONTAINER, podman:CONTAINER, ssh:[USER@]HOST
+    """
+    kind, _, value = spec.partition(":")
+    if kind == "local":
+        name, _, cwd = value.partition("=")
+        return LocalTarget(name or "local", cwd or None)
+    if not value:
+        raise ValueError(f"Target '{spec}' is missing a value after ':'.")
+    if kind == "chroot":
+        return ChrootTarget(value)
+    if kind in ("docker", "podman"):
+        return ContainerTarget(value, engine=kind)
+    if kind == "ssh":
+        return SSHTarget(value)
+    raise ValueError(f"Unknown target type '{kind}'.")
+
+
+###################################
+# Executors
+###################################
+class Executor(ABC):
+    """
+    Runs a cart. run_cart() returns {target name: [ItemResult, ...]} with
+    items in cart order for every target.
+
+    item_timeout bounds each command and run_timeout bounds the whole run
+    (both in seconds, None for no limit). Setting cancel_event stops the
+    command in progress and skips the rest of the cart.
+    """
+
+    @abstractmethod
+    def run_cart(self, cart_items, env=None, item_timeout=None, run_timeout=None, cancel_event=None):
+        """Runs cart_items and returns {target name: [ItemResult, ...]}."""
+
+    def run_on_target(self, target, cart_items, env=None, item_timeout=None, deadline=None, cancel_event=None):
+        """Runs each item's command on target in order, printing progress as it goes."""
+        results = []
+        for (name, version, command) in cart_items:
+            if not command:
+                print(f"{target.prefix}No command to run for {name} v{version}")
+                continue
+
+            if cancel_event is not None and cancel_event.is_set():
+                results.append(ItemResult(name, version, command, None, "", "not started", "cancelled"))
+                continue
+            timeout = item_timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    results.append(ItemResult(name, version, command, None, "", "run deadline passed", "timeout"))
+                    continue
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            print(f"{target.prefix}Running command for {name} v{version}: {command}")
+            try:
+                returncode, stdout, stderr = target.run(command, env, timeout, cancel_event)
+                status = "ok" if returncode == 0 else "failed"
+            except CommandTimeout as e:
+                returncode, stdout, stderr, status = None, "", str(e), "timeout"
+            except CommandCancelled as e:
+                returncode, stdout, stderr, status = None, "", str(e), "cancelled"
+            except OSError as e:
+                returncode, stdout, stderr, status = -1, "", str(e), "failed"
+            if status == "ok":
+                # Prefix every line so concurrent targets' output stays attributable
+                for line in stdout.splitlines():
+                    print(f"{target.prefix}{line}")
+            else:
+                print(f"{target.prefix}Error running command for {name} v{version}:")
+                for line in stderr.splitlines():
+                    print(f"{target.prefix}{line}")
+            results.append(ItemResult(name, version, command, returncode, stdout, stderr, status))
+        return results
+
+
+def _deadline(run_timeout):
+    return None if run_timeout is None else time.monotonic() + run_timeout
+
+
+class LocalExecutor(Executor):
+    """Runs the cart sequentially on this machine."""
+
+    def __init__(self, target=None):
+        self.target = target or LocalTarget()
+
+    def run_cart(self, cart_items, env=None, item_timeout=None, run_timeout=None, cancel_event=None):
+        try:
+            results = self.run_on_target(
+                self.target, cart_items, env, item_timeout, _deadline(run_timeout), cancel_event
+            )
+        finally:
+            self.target.close()
+        return {self.target.name: results}
+
+
+class FanOutExecutor(Executor):
+    """
+    Applies the same cart to many targets at once. Each target installs the
+    items in order; up to max_workers targets run concurrently. Workers are
+    threads because the real work happens in child processes.
+    """
+
+    def __init__(self, targets, max_workers=4):
+        names = [target.name for target in targets]
+        if len(set(names)) != len(names):
+            raise ValueError("Fan-out targets must have unique names.")
+        self.targets = list(targets)
+        self.max_workers = max(1, max_workers)
+
+    def run_cart(self, cart_items, env=None, item_timeout=None, run_timeout=None, cancel_event=None):
+        cart_items = list(cart_items)
+        deadline = _deadline(run_timeout)
+        # Workers always get an event, so an interrupt here can stop them
+        if cancel_event is None:
+            cancel_event = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {
+                target.name: pool.submit(
+                    self.run_on_target, target, cart_items, env, item_timeout, deadline, cancel_event
+                )
+                for target in self.targets
+            }
+            return {name: future.result() for name, future in futures.items()}
+        except BaseException:
+            # Ctrl-C (or a failed worker): drop targets not started yet and
+            # kill the commands in progress instead of waiting for them
+            cancel_event.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            pool.shutdown(wait=True)
+            for target in self.targets:
+                target.close()
+
+
+def summarize(results):
+    """Returns {target name: (succeeded, failed)} counts for run_cart() output."""
+    return {
+        name: (
+            sum(1 for item in items if item.status == "ok"),
+            sum(1 for item in items if item.status != "ok"),
+        )
+        for name, items in results.items()
+    }
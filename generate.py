@@ -1,31 +1,232 @@
+import hashlib
+import json
+import os
+import shlex
+import threading
+import time
+
 import ollama
 
-def generate_install_commands(user_os, library, package_manager, version):
-    """
-    Uses a locally running DeepSeek model from Ollama to generate install commands.
-    """
+import cache
+import manifest
+
+MODEL = "deepseek-coder:6.7b"
+# Bump when the prompt or validation rules change so old cache entries are ignored
+PROMPT_VERSION = 2
+MAX_ATTEMPTS = 3
+# Known-bad answers are only trusted for a while; the model may do better later
+NEGATIVE_TTL = 24 * 60 * 60
+
+# What users type for a package manager, mapped to the name used below
+MANAGER_NAMES = {
+    "pip3": "pip",
+    "python-pip": "pip",
+    "apt-get": "apt",
+    "homebrew": "brew",
+    "chocolatey": "choco",
+    "nodejs": "npm",
+    "node": "npm",
+    "windows package manager": "winget",
+}
+
+# Executables accepted as the first word of a command for each package manager
+MANAGER_ALIASES = {
+    "pip": ("pip", "pip3", "python -m pip", "python3 -m pip"),
+    "apt": ("apt", "apt-get"),
+    "npm": ("npm",),
+    "brew": ("brew",),
+    "choco": ("choco",),
+    "winget": ("winget",),
+}
+
+# sudo options whose value is the following token
+SUDO_OPTIONS_WITH_VALUE = ("-u", "--user", "-g", "--group", "-h", "--host", "-p", "--prompt",
+                           "-C", "--close-from", "-D", "--chdir", "-r", "--role", "-t", "--type",
+                           "-U", "--other-user", "-T", "--command-timeout")
+
+_cache_lock = threading.Lock()
+
+
+class GenerationError(Exception):
+    """Raised when no valid install commands could be generated."""
+
+
+def _build_prompt(user_os, library, package_manager, version, feedback=None):
     prompt = (
         f"You are an assistant that generates terminal commands. "
         f"MAKE SURE to put the $ symbol in front of every command NO MATTER WHAT. "
         f"MAKE SURE to put the version as {version} NO MATTER WHAT. "
         f"Provide only the exact commands (one per line) needed to install {library} "
-        f"on {user_os} using {package_manager}. Do not include any extra explanation. This should be formatted as lines of text exactly as the appear in terminal with absolultely no other text other than these commands." 
-        f"Please do not list with numbers or provide any other text/explanation it should just be the command followed by a new line if there are multiple commands. " 
+        f"on {user_os} using {package_manager}. Do not include any extra explanation. This should be formatted as lines of text exactly as the appear in terminal with absolultely no other text other than these commands."
+        f"Please do not list with numbers or provide any other text/explanation it should just be the command followed by a new line if there are multiple commands. "
         f"Having any other text will cause egregious errors in the code and will cause complete system failure. Do not give me any steps only the commands to run in the shell. If version not provided assume latest version. "
         f"Do not use any other package manager other than {package_manager}. "
         f"Do not use any other OS other than {user_os}. "
         f"Do not use any other library other than {library}. "
     )
+    if feedback:
+        prompt += f"Your previous answer was rejected because {feedback}. Fix that. "
+    return prompt
+
+
+###################################
+# Post-processing
+###################################
+def parse_commands(content):
+    """
+    Pulls the '$ '-prefixed commands out of a model response, normalized
+    (surrounding whitespace and trailing ';' removed) and deduplicated in order.
+    """
+    commands = []
+    seen = set()
+    for line in content.splitlines():
+        line = line.strip()
+        if not line.startswith("$ "):
+            continue
+        command = line[2:].strip().rstrip(";").strip()
+        key = " ".join(command.split())
+        if command and key not in seen:
+            seen.add(key)
+            commands.append(command)
+    return commands
+
+
+def normalize_manager(package_manager):
+    """Canonical lower-case name for a package manager, e.g. "Homebrew" -> "brew"."""
+    manager = " ".join(package_manager.lower().split())
+    return MANAGER_NAMES.get(manager, manager)
+
+
+def _strip_sudo(tokens):
+    """Drops a leading sudo together with its options and VAR=value assignments."""
+    if not tokens or tokens[0] != "sudo":
+        return tokens
+    i = 1
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "--":
+            return tokens[i + 1:]
+        if token in SUDO_OPTIONS_WITH_VALUE:
+            i += 2
+        elif token.startswith("-") or ("=" in token and not token.startswith("=")):
+            i += 1
+        else:
+            break
+    return tokens[i:]
+
+
+def _uses_manager(tokens, package_manager):
+    tokens = [token.lower() for token in _strip_sudo(tokens)]
+    aliases = MANAGER_ALIASES.get(package_manager, (package_manager,))
+    return any(tokens[:len(alias.split())] == alias.split() for alias in aliases)
+
+
+def validate_command(command, package_manager):
+    """Returns why command is unacceptable, or None if it looks runnable."""
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        return f"'{command}' has unbalanced quotes"
+    if not tokens:
+        return "a command was empty"
+    if any(token.startswith("<") and token.endswith(">") for token in tokens):
+        return f"'{command}' contains a placeholder"
+    manager = normalize_manager(package_manager)
+    if manager and manager != "any package manager" and not _uses_manager(tokens, manager):
+        return f"'{command}' does not use {package_manager}"
+    return None
+
+
+def validate_commands(commands, package_manager):
+    """Returns why the command list is unacceptable, or None if every command passes."""
+    if not commands:
+        return "it contained no '$ ' commands"
+    for command in commands:
+        reason = validate_command(command, package_manager)
+        if reason:
+            return reason
+    return None
+
+
+###################################
+# Result cache
+###################################
+def fingerprint(user_os, library, package_manager, version):
+    """Stable key for a generation request; includes the model and prompt version."""
+    key = [MODEL, PROMPT_VERSION, user_os.lower(), library.strip().lower(),
+           normalize_manager(package_manager), version.strip().lower()]
+    return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+
+def _cache_path():
+    return os.path.join(cache.default_cache_root(), "generate.json")
+
+
+def _load_cache():
+    try:
+        with open(_cache_path(), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remember(key, entry):
+    with _cache_lock:
+        entries = _load_cache()
+        entries[key] = dict(entry, time=time.time())
+        os.makedirs(os.path.dirname(_cache_path()), exist_ok=True)
+        manifest.atomic_write(_cache_path(), json.dumps(entries, indent=1).encode())
+
+
+def _lookup(key):
+    with _cache_lock:
+        entry = _load_cache().get(key)
+    if entry and "error" in entry and time.time() - entry.get("time", 0) > NEGATIVE_TTL:
+        return None
+    return entry
+
+
+###################################
+# Generation
+###################################
+def _ask_model(prompt):
+    try:
+        response = ollama.chat(model=MODEL, messages=[{"role": "user", "content": prompt}])
+        return response["message"]["content"]
+    except (KeyError, TypeError):
+        raise GenerationError("No response from Ollama.")
+    except Exception as e:
+        raise GenerationError(f"Could not reach Ollama: {e}")
+
+
+def generate_install_commands(user_os, library, package_manager, version, max_attempts=MAX_ATTEMPTS, use_cache=True):
+    """
+    Uses a locally running DeepSeek model from Ollama to generate install commands.
+
+    The response is parsed, normalized, deduplicated and validated; a bad
+    answer is retried (telling the model what was wrong) up to max_attempts
+    times. Validated answers and exhausted failures are remembered under a
+    fingerprint of the request, so repeats are served without querying the
+    model. Returns a list of command strings or raises GenerationError.
+    """
+    key = fingerprint(user_os, library, package_manager, version)
+    if use_cache:
+        entry = _lookup(key)
+        if entry and "commands" in entry:
+            return list(entry["commands"])
+        if entry and "error" in entry:
+            raise GenerationError(f"Previously failed: {entry['error']}")
 
-    response = ollama.chat(model="deepseek-coder:6.7b", messages=[{"role": "user", "content": prompt}])
-    #print(response["message"]["content"])
-    if "message" in response:
-        commands = []
-        for message in response["message"]["content"].split("\n"):
-            if message.startswith("$ "):
-                command = message[2:]
-                commands.append(command)
-        return commands
-    else:
-        return "Error: No response from Ollama."
+    feedback = None
+    for _ in range(max_attempts):
+        content = _ask_model(_build_prompt(user_os, library, package_manager, version, feedback))
+        commands = parse_commands(content)
+        feedback = validate_commands(commands, package_manager)
+        if feedback is None:
+            if use_cache:
+                _remember(key, {"commands": commands})
+            return commands
 
+    if use_cache:
+        _remember(key, {"error": feedback})
+    raise GenerationError(f"Model output rejected after {max_attempts} attempts: {feedback}")
@@ -1,107 +1,164 @@
 import tkinter as tk
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-import yaml
-import subprocess
 import generate
+import manifest
+import cache
+import executors
+import watch
+import argparse
 import platform
+import os
+import threading
+import queue
 
 
 ###################################
 # Data Extraction and Command Logic
 ###################################
-def extract_tuples(config_path):
+def iter_entries(config_path):
     """
-    Reads the YAML configuration file and extracts:
-      - name, version, install_command(s)
-    for each item in package_managers, environment, or developer_tools.
+    Yields (section, name, raw) for each entry of a manifest without normalizing it.
+    For YAML, raw is the entry's details dictionary from package_managers,
+    environment, or developer_tools, and section is that key; binary manifests
+    (.hbm) have no sections (None) and already hold normalized commands, so
+    raw is the finished (name, version, command) tuple.
+    """
+    if manifest.is_binary_manifest(config_path):
+        for item in manifest.iter_binary(config_path):
+            yield None, item[0], item
+        return
+
+    config = manifest.load_yaml(config_path) or {}
+
+    for section in ["package_managers", "environment", "developer_tools"]:
+        if section in config:
+            for name, details in config[section].items():
+                yield section, name, details
+
 
+def normalize_entry(name, raw, convert=True):
+    """
+    Turns one entry from iter_entries into a (name:str, version:str, command:str) tuple.
     If 'install_command' is a multi-line string or list, it is converted into a single shell-executable string.
-    
-    Returns a list of (name:str, version:str, command:str) tuples.
+    With convert=False the manifest's own command is kept and the model is never queried.
     """
-    with open(config_path, "r") as file:
-        config = yaml.safe_load(file)
+    if isinstance(raw, tuple):
+        return raw
 
-    results = []
     current_os = platform.system().lower()
     target_os = "windows" if current_os == "darwin" else "darwin"
 
-    for section in ["package_managers", "environment", "developer_tools"]:
-        if section in config:
-            for name, details in config[section].items():
-                version = details.get("version", "latest")
-                command = details.get("install_command", "")
+    version = raw.get("version", "latest")
+    command = raw.get("install_command", "")
 
-                # Normalize install_command into a single string
-                if isinstance(command, str):
-                    command_str = " && ".join(cmd.strip() for cmd in command.splitlines() if cmd.strip())  # Join multiline
-                elif isinstance(command, list):
-                    command_str = " && ".join(command)  # Join list into a string
-                else:
-                    command_str = ""
+    # Normalize install_command into a single string
+    if isinstance(command, str):
+        command_str = " && ".join(cmd.strip() for cmd in command.splitlines() if cmd.strip())  # Join multiline
+    elif isinstance(command, list):
+        command_str = " && ".join(command)  # Join list into a string
+    else:
+        command_str = ""
 
-                # Convert command if necessary
-                if current_os != target_os:
-                    package_manager = "brew" if current_os == "darwin" else "winget"
-                    converted_commands = generate_install_commands(current_os, name, package_manager)
-                    command_str = " && ".join(converted_commands)
+    # Convert command if necessary
+    if convert and current_os != target_os:
+        package_manager = "brew" if current_os == "darwin" else "winget"
+        try:
+            converted_commands = generate.generate_install_commands(current_os, name, package_manager, version)
+            command_str = " && ".join(converted_commands)
+        except generate.GenerationError as e:
+            # Keep the manifest's own command rather than dropping the entry
+            print(f"Could not convert command for {name}: {e}")
 
-                results.append((name, version, command_str))  # Store as a single string
+    return (name, version, command_str)
 
-    return results
 
-import yaml
+def iter_tuples(config_path, convert=True):
+    """
+    Reads the YAML configuration file and yields a normalized
+    (name:str, version:str, command:str) tuple as soon as each entry in
+    package_managers, environment, or developer_tools has been processed.
+
+    Callers can start consuming items before the slow per-entry work
+    (command generation) has finished for the rest of the manifest.
+
+    Binary manifests (.hbm) already hold normalized commands and are yielded as-is.
+    Pass convert=False to keep the manifest's install_command instead of
+    generating one for this OS.
+    """
+    for _, name, raw in iter_entries(config_path):
+        yield normalize_entry(name, raw, convert)
+
+
+def extract_tuples(config_path):
+    """
+    Reads the YAML configuration file and extracts:
+      - name, version, install_command(s)
+    for each item in package_managers, environment, or developer_tools.
+
+    If 'install_command' is a multi-line string or list, it is converted into a single shell-executable string.
+    
+    Returns a list of (name:str, version:str, command:str) tuples.
+    """
+    return list(iter_tuples(config_path))
 
 def tuples_to_yaml(tuples_list, output_path):
     """
     Converts a list of (name, version, command) tuples back to a YAML configuration file.
-    Places all items in the "environment" section.
+    Places all items in the "environment" section. Commands are split back into
+    their individual steps and the file is replaced atomically.
     
     Args:
         tuples_list: List of (name, version, command) tuples
         output_path: Path where the YAML file will be saved
     """
-    config = {
-        "environment": {}
-    }
-    
-    for name, version, command in tuples_list:
-        if isinstance(command, str):
-            if " &&" in command:
-                command_list = command.split(" &&")
-            else:
-                command_list = [command] 
-        else:
-            command_list = command  
+    return manifest.dump_yaml(tuples_list, output_path)
 
-        config["environment"][name] = {
-            "version": version,
-            "install_command": command_list
-        }
-    
-    with open(output_path, "w") as file:
-        yaml.dump(config, file, default_flow_style=False, sort_keys=False)
-    
-    return config
+
+def _env_seconds(name):
+    """Reads an optional timeout in seconds from the environment."""
+    value = os.environ.get(name)
+    return float(value) if value else None
 
 
-def run_commands(cart_items):
+def run_commands(cart_items, artifact_cache=None, executor=None,
+                 item_timeout=None, run_timeout=None, cancel_event=None):
     """
     Executes the command from each tuple in cart_items.
     cart_items is a list of (Name, Version, Command) tuples.
+
+    Work is sent through executor (a local executors.LocalExecutor unless one
+    is passed in), so the same cart can also be fanned out to many targets.
+    Installers run with the shared artifact cache's environment (the default
+    cache unless one is passed in), and the cache is trimmed afterwards.
+
+    item_timeout and run_timeout (seconds) bound each command and the whole
+    run, defaulting to HABITAT_ITEM_TIMEOUT / HABITAT_RUN_TIMEOUT. Commands
+    that time out, or are running when cancel_event is set, are killed along
+    with their children.
+
+    Returns {target name: [executors.ItemResult, ...]}.
     """
-    for (name, version, command) in cart_items:
-        if command:
-            print(f"Running command for {name} v{version}: {command}")
-            try:
-                result = subprocess.run(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                print(result.stdout.decode())
-            except subprocess.CalledProcessError as e:
-                print(f"Error running command for {name} v{version}: {e.stderr.decode()}")
-        else:
-            print(f"No command to run for {name} v{version}")
+    artifact_cache = artifact_cache or cache.ArtifactCache()
+    executor = executor or executors.LocalExecutor()
+    env = artifact_cache.env()
+    if item_timeout is None:
+        item_timeout = _env_seconds("HABITAT_ITEM_TIMEOUT")
+    if run_timeout is None:
+        run_timeout = _env_seconds("HABITAT_RUN_TIMEOUT")
+
+    items = [
+        (name, version, artifact_cache.wrap_command(command) if command else command)
+        for (name, version, command) in cart_items
+    ]
+    results = executor.run_cart(items, env, item_timeout, run_timeout, cancel_event)
+
+    artifact_cache.prune()
+    if len(results) > 1:
+        for target_name, (succeeded, failed) in executors.summarize(results).items():
+            print(f"[{target_name}] {succeeded} succeeded, {failed} failed")
     print("All commands run.")
+    return results
 
 ###################################
 # Main HabitatApp and Pages
@@ -135,6 +192,12 @@ class HabitatApp(ctk.CTk):
             frame.grid(row=0, column=0, sticky="nsew")
 
         self.show_frame("WelcomePage")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """Stops a cart run still in progress before the window goes away."""
+        self.frames["CartPage"].stop_run()
+        self.destroy()
 
     def center_window(self, width=450, height=450):
         """Centers the window on the screen."""
@@ -163,6 +226,48 @@ class HabitatApp(ctk.CTk):
                 "Duplicate Entry", f"'{name} v{version}' is already in the cart."
             )
 
+    def extend_cart(self, items):
+        """Appends a batch of (name, version, command) items, skipping duplicates silently."""
+        new_items = [item for item in items if item not in self.software_cart]
+        self.software_cart.extend(new_items)
+        self.frames["CartPage"].append_items(new_items)
+        self.frames["CreatePage"].update_cart_button()
+        return new_items
+
+    def apply_manifest_diff(self, diff):
+        """
+        Applies a watch.ManifestDiff to the cart in place. Items are matched by
+        name and command, since only the version is editable in the cart and
+        the same name may appear in several sections; a version the user
+        edited is kept when the entry changes, and entries the user removed
+        are not brought back.
+        """
+        self.frames["CartPage"].commit_edits()
+        cart = list(self.software_cart)
+
+        def find(old_item):
+            for idx, item in enumerate(cart):
+                if (item[0], item[2]) == (old_item[0], old_item[2]):
+                    return idx
+            return None
+
+        for old_item in diff.removed:
+            idx = find(old_item)
+            if idx is not None:
+                del cart[idx]
+
+        for old_item, new_item in diff.changed:
+            idx = find(old_item)
+            if idx is not None:
+                version = new_item[1] if cart[idx][1] == old_item[1] else cart[idx][1]
+                cart[idx] = (new_item[0], version, new_item[2])
+
+        cart.extend(item for item in diff.added if find(item) is None)
+
+        self.software_cart[:] = cart
+        self.frames["CartPage"].refresh_cart()
+        self.frames["CreatePage"].update_cart_button()
+
     def clear_cart(self):
         self.software_cart.clear()
         self.frames["CartPage"].refresh_cart()
@@ -196,29 +301,176 @@ class WelcomePage(ctk.CTkFrame):
             command=self.import_file
         )
         import_button.pack(pady=6, anchor="center")
+        self.import_button = import_button
+
+        self.watch_var = tk.BooleanVar(value=False)
+        watch_checkbox = ctk.CTkCheckBox(
+            self,
+            text="Watch for changes",
+            variable=self.watch_var,
+            command=self.on_toggle_watch
+        )
+        watch_checkbox.pack(pady=6, anchor="center")
+
+        self.import_queue = queue.Queue()
+        self.import_count = 0
+
+        # Watch mode: the last imported manifest and what was taken from it
+        self.import_path = None
+        self.sync = watch.ManifestSync(iter_entries, normalize_entry)
+        self.watcher = None
+        self.sync_queue = queue.Queue()
+        self.sync_after = None  # pending _poll_sync callback while watching
 
     def import_file(self):
         file_path = filedialog.askopenfilename(
-            title="Import Dependencies (.yaml only)",
-            filetypes=[("YAML Files", "*.yaml"), ("All Files", "*.*")],
+            title="Import Dependencies (.yaml or .hbm)",
+            filetypes=[
+                ("YAML Files", "*.yaml *.yml"),
+                ("Habitat Binary Manifests", f"*{manifest.BINARY_EXTENSION}"),
+                ("All Files", "*.*"),
+            ],
         )
         if not file_path:
             return
-        if not file_path.lower().endswith(".yaml"):
-            messagebox.showerror("Error", "Please select a .yaml file.")
+        if not file_path.lower().endswith((".yaml", ".yml", manifest.BINARY_EXTENSION)):
+            messagebox.showerror("Error", "Please select a .yaml or .hbm file.")
             return
+        self.stop_watching()
+        self.import_path = None
+        # Start from a fresh baseline and drop diffs computed for the previous manifest
+        self.sync = watch.ManifestSync(iter_entries, normalize_entry)
+        self._drain_sync_queue()
         self.controller.clear_cart()
 
+        # Parse (and possibly generate commands) off the Tk thread; items are
+        # handed back through a queue and added to the cart as they arrive.
+        self.import_count = 0
+        self.import_button.configure(state="disabled")
+
+        worker = threading.Thread(target=self._import_worker, args=(self.sync, file_path), daemon=True)
+        worker.start()
+        self.controller.show_frame("CartPage")
+        self.controller.frames["CartPage"].set_progress("Importing...")
+        self.after(50, self._poll_import)
+
+    def _import_worker(self, sync, file_path):
+        """Runs on a background thread; never touches Tk widgets or page state."""
         try:
-            all_items = extract_tuples(file_path)
-            if all_items:
-                for (name, version, cmd) in all_items:
-                    self.controller.add_to_cart(name, version, cmd)
+            for item in sync.iter_load(file_path):
+                self.import_queue.put(("item", item))
+        except Exception as e:
+            self.import_queue.put(("error", e))
+        self.import_queue.put(("done", file_path))
+
+    def _poll_import(self):
+        """Drains the import queue on the Tk thread and updates the cart in batches."""
+        batch = []
+        finished = False
+        error = None
+        while True:
+            try:
+                kind, payload = self.import_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "item":
+                batch.append(payload)
+            elif kind == "error":
+                error = payload
             else:
-                messagebox.showinfo("No Commands Found", "No valid commands found in YAML.")
-            self.controller.show_frame("CartPage")
+                finished = True
+                file_path = payload
+                break
+
+        if batch:
+            self.import_count += len(self.controller.extend_cart(batch))
+            self.controller.frames["CartPage"].set_progress(f"Imported {self.import_count} item(s)...")
+
+        if not finished:
+            self.after(50, self._poll_import)
+            return
+
+        self.controller.frames["CartPage"].set_progress(None)
+        self.import_button.configure(state="normal")
+
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to parse YAML: {error}")
+            return
+        self.import_path = file_path
+        if self.watch_var.get():
+            self.start_watching()
+        if not self.import_count:
+            messagebox.showinfo("No Commands Found", "No valid commands found in YAML.")
+
+    ###################################
+    # Watch Mode
+    ###################################
+    def on_toggle_watch(self):
+        if self.watch_var.get():
+            self.start_watching()
+        else:
+            self.stop_watching()
+
+    def start_watching(self):
+        """
+        Re-syncs the cart whenever the imported manifest changes on disk, and
+        once right away to pick up edits made since it was imported.
+        """
+        if self.watcher is not None or self.import_path is None:
+            return
+        sync, path = self.sync, self.import_path
+        self.watcher = watch.ManifestWatcher(
+            path, lambda: self._sync_worker(sync, path), check_on_start=True
+        )
+        self.watcher.start()
+        if self.sync_after is None:
+            self.sync_after = self.after(200, self._poll_sync)
+
+    def stop_watching(self):
+        """
+        Stops the watcher without blocking the Tk thread. A diff it is still
+        computing lands in the queue and is applied when watching resumes,
+        or dropped if another manifest is imported first.
+        """
+        if self.watcher is not None:
+            self.watcher.stop(wait=False)
+            self.watcher = None
+        if self.sync_after is not None:
+            self.after_cancel(self.sync_after)
+            self.sync_after = None
+
+    def _drain_sync_queue(self):
+        while True:
+            try:
+                self.sync_queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _sync_worker(self, sync, path):
+        """Runs on the watcher thread; only changed entries are normalized."""
+        try:
+            self.sync_queue.put(("diff", sync, sync.diff(path)))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to parse YAML: {e}")
+            self.sync_queue.put(("error", sync, e))
+
+    def _poll_sync(self):
+        """Applies queued manifest diffs on the Tk thread while watching."""
+        while True:
+            try:
+                kind, sync, payload = self.sync_queue.get_nowait()
+            except queue.Empty:
+                break
+            if sync is not self.sync:
+                continue  # computed for a manifest that has since been replaced
+            if kind == "error":
+                print(f"Error syncing manifest: {payload}")
+            elif any(payload):
+                self.controller.apply_manifest_diff(payload)
+                print(
+                    f"Synced manifest: {len(payload.added)} added, "
+                    f"{len(payload.removed)} removed, {len(payload.changed)} changed"
+                )
+        self.sync_after = self.after(200, self._poll_sync) if self.watcher is not None else None
 
 
 class CreatePage(ctk.CTkFrame):
@@ -374,14 +626,14 @@ class CreatePage(ctk.CTkFrame):
             messagebox.showwarning("Input Error", "Please enter Version, Software Name, and Package Manager.")
             return
 
-        install_commands = generate.generate_install_commands(user_os, library, package_manager, version)
-
-        if isinstance(install_commands, list) and install_commands:
-            install_command_str = " && ".join(install_commands) 
-        else:
-            messagebox.showerror("Error", "Failed to generate install command.")
+        try:
+            install_commands = generate.generate_install_commands(user_os, library, package_manager, version)
+        except generate.GenerationError as e:
+            messagebox.showerror("Error", f"Failed to generate install command: {e}")
             return
 
+        install_command_str = " && ".join(install_commands)
+
         self.controller.add_to_cart(library, version, install_command_str)
 
         self.version_entry.delete(0, tk.END)
@@ -530,6 +782,7 @@ class CartPage(ctk.CTkFrame):
         super().__init__(parent, corner_radius=0, border_width=0, fg_color="transparent")
         self.controller = controller
         self.version_entries = {}  # Store version entry widgets
+        self.remove_buttons = {}  # Store remove buttons so they can be re-pointed on edit
 
         title_label = ctk.CTkLabel(
             self,
@@ -538,6 +791,18 @@ class CartPage(ctk.CTkFrame):
         )
         title_label.pack(pady=(10, 6), anchor="center")
 
+        # Progress indicator for imports that are still streaming in
+        self.progress_frame = ctk.CTkFrame(self, corner_radius=0, border_width=0, fg_color="transparent")
+        self.progress_label = ctk.CTkLabel(self.progress_frame, text="")
+        self.progress_label.pack(side="left", padx=(0, 8))
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame, width=160, mode="indeterminate")
+        self.progress_bar.pack(side="left")
+
+        # State for a run happening on a background thread
+        self.cancel_event = threading.Event()
+        self.run_results = queue.Queue()
+        self.run_thread = None
+
         self.scroll_frame = ctk.CTkScrollableFrame(
             self,
             width=350,
@@ -551,10 +816,14 @@ class CartPage(ctk.CTkFrame):
         bottom_frame.pack(fill="x", pady=6)
 
 
-        run_button = ctk.CTkButton(
+        self.run_button = ctk.CTkButton(
             bottom_frame, text="Run", width=60, command=self.on_run_commands
         )
-        run_button.pack(side="right", padx=(0, 20))
+        self.run_button.pack(side="right", padx=(0, 20))
+        self.cancel_button = ctk.CTkButton(
+            bottom_frame, text="Cancel", width=60, state="disabled", command=self.on_cancel_run
+        )
+        self.cancel_button.pack(side="right", padx=(0, 10))
         export_button = ctk.CTkButton(bottom_frame, text="Export", width=60, command=self.export_to_yaml)
         export_button.pack(side="right", padx=(0, 10))
         
@@ -569,8 +838,13 @@ class CartPage(ctk.CTkFrame):
             widget.destroy()
             
         self.version_entries.clear()
+        self.remove_buttons.clear()
 
-        for idx, item in enumerate(self.controller.software_cart, start=1):
+        self.append_items(self.controller.software_cart)
+
+    def append_items(self, items):
+        """Adds rows for new cart items without rebuilding (and losing edits in) existing rows."""
+        for idx, item in enumerate(items, start=len(self.version_entries) + 1):
             name, version, cmd = item
             
             item_frame = ctk.CTkFrame(
@@ -605,6 +879,45 @@ class CartPage(ctk.CTkFrame):
                 item_frame, text="X", width=25, command=lambda t=item: self.remove_from_cart(t)
             )
             remove_button.pack(side="right", padx=5)
+            self.remove_buttons[item] = remove_button
+
+    def update_version(self, item, entry_widget):
+        """Writes an edited version back into the cart in place."""
+        if item not in self.controller.software_cart:
+            return
+        name, version, cmd = item
+        new_version = entry_widget.get().strip() or "latest"
+        if new_version == version:
+            return
+
+        new_item = (name, new_version, cmd)
+        cart = self.controller.software_cart
+        cart[cart.index(item)] = new_item
+
+        # Re-point the row's widgets at the updated tuple
+        self.version_entries = {
+            (new_item if key == item else key): widget for key, widget in self.version_entries.items()
+        }
+        remove_button = self.remove_buttons.pop(item)
+        remove_button.configure(command=lambda t=new_item: self.remove_from_cart(t))
+        self.remove_buttons[new_item] = remove_button
+        entry_widget.bind("<FocusOut>", lambda e, i=new_item, v=entry_widget: self.update_version(i, v))
+
+    def commit_edits(self):
+        """Writes any version edits still sitting in entry fields back into the cart."""
+        for item, entry_widget in list(self.version_entries.items()):
+            self.update_version(item, entry_widget)
+
+    def set_progress(self, text):
+        """Shows a progress message with a busy indicator, or hides it when text is None."""
+        if text is None:
+            self.progress_bar.stop()
+            self.progress_frame.pack_forget()
+            return
+        self.progress_label.configure(text=text)
+        if not self.progress_frame.winfo_ismapped():
+            self.progress_frame.pack(pady=(0, 4), anchor="center", before=self.scroll_frame)
+            self.progress_bar.start()
 
     def update_all_versions(self):
         """Updates all item versions based on entry fields."""
@@ -634,15 +947,69 @@ class CartPage(ctk.CTkFrame):
             messagebox.showwarning("Not Found", "Item is not in the cart.")
 
     def on_run_commands(self):
-        """Run commands with the latest versions."""
+        """Run commands with the latest versions on a background thread so the window stays responsive."""
         self.update_all_versions()
 
-        if self.controller.software_cart:
-            run_commands(self.controller.software_cart)
-            messagebox.showinfo("Done", "Commands executed (see console output).")
-        else:
-            messagebox.showinfo("Empty Cart", "No items to install.")
+        if not self.controller.software_cart:
             messagebox.showinfo("Empty Cart", "No items to install.")
+            return
+
+        self.cancel_event.clear()
+        self.run_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        self.set_progress("Running...")
+
+        cart = list(self.controller.software_cart)
+        self.run_thread = threading.Thread(target=self._run_worker, args=(cart,), daemon=True)
+        self.run_thread.start()
+        self.after(100, self._poll_run)
+
+    def _run_worker(self, cart):
+        """Runs on a background thread; never touches Tk widgets."""
+        try:
+            self.run_results.put(("done", run_commands(cart, cancel_event=self.cancel_event)))
+        except Exception as e:
+            self.run_results.put(("error", e))
+
+    def _poll_run(self):
+        try:
+            kind, payload = self.run_results.get_nowait()
+        except queue.Empty:
+            self.after(100, self._poll_run)
+            return
+
+        self.set_progress(None)
+        self.run_button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
+
+        if kind == "error":
+            messagebox.showerror("Error", f"Run failed: {payload}")
+            return
+
+        statuses = [item.status for items in payload.values() for item in items]
+        if self.cancel_event.is_set():
+            messagebox.showinfo("Cancelled", "Run cancelled (see console output).")
+        elif any(status == "timeout" for status in statuses):
+            timed_out = statuses.count("timeout")
+            messagebox.showwarning("Timed Out", f"{timed_out} command(s) timed out (see console output).")
+        else:
+            messagebox.showinfo("Done", "Commands executed (see console output).")
+
+    def on_cancel_run(self):
+        """Stops the command in progress (and its children) and skips the rest of the cart."""
+        self.cancel_event.set()
+        self.cancel_button.configure(state="disabled")
+        self.set_progress("Cancelling...")
+
+    def stop_run(self):
+        """
+        Cancels a run in progress and waits for its worker, so closing the
+        window does not leave installers running behind a dead daemon thread.
+        """
+        if self.run_thread is not None and self.run_thread.is_alive():
+            self.cancel_event.set()
+            self.run_thread.join()
+        self.run_thread = None
 
     def on_back(self):
         self.update_all_versions()
@@ -656,11 +1023,90 @@ class CartPage(ctk.CTkFrame):
         super().tkraise(aboveThis)
         
     def export_to_yaml(self):
-        if self.controller.software_cart:
-            tuples_to_yaml(self.controller.software_cart, "habitat.yaml")
-            messagebox.showinfo("Exported", "Cart items exported to habitat.yaml.")
-        else:
+        if not self.controller.software_cart:
             messagebox.showwarning("Empty Cart", "No items to export.")
-if __name__ == "__main__":
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            title="Export Dependencies",
+            initialfile="habitat.yaml",
+            defaultextension=".yaml",
+            filetypes=[
+                ("YAML Files", "*.yaml *.yml"),
+                ("Habitat Binary Manifests", f"*{manifest.BINARY_EXTENSION}"),
+            ],
+        )
+        if not file_path:
+            return
+
+        try:
+            manifest.export_manifest(self.controller.software_cart, file_path)
+            messagebox.showinfo("Exported", f"Cart items exported to {file_path}.")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export cart: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(prog="habitat", description="Habitat dependency manager.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    prefetch_parser = subparsers.add_parser(
+        "prefetch", help="Download a manifest's artifacts into the local cache without installing."
+    )
+    prefetch_parser.add_argument("manifest", help="Path to a .yaml or .hbm manifest")
+    prefetch_parser.add_argument("--cache-dir", help="Cache directory (default: HABITAT_CACHE_DIR or ~/.cache/habitat)")
+    prefetch_parser.add_argument("--max-size-mb", type=int, help="Size cap for the cache; LRU files beyond it are removed")
+    mirror_help = "Registry mirror (repeatable): pip=URL, npm=URL or brew=URL (default: HABITAT_<MANAGER>_MIRROR)"
+    prefetch_parser.add_argument("--mirror", action="append", default=[], dest="mirrors", help=mirror_help)
+
+    run_parser = subparsers.add_parser(
+        "run", help="Install a manifest's items without the GUI, on this machine or many targets."
+    )
+    run_parser.add_argument("manifest", help="Path to a .yaml or .hbm manifest")
+    run_parser.add_argument(
+        "--target", action="append", default=[], dest="targets",
+        help="Install target (repeatable): local, local:NAME[=CWD], chroot:PATH, docker:NAME, podman:NAME, ssh:HOST",
+    )
+    run_parser.add_argument("--jobs", type=int, default=4, help="Maximum number of targets installed concurrently")
+    run_parser.add_argument("--timeout", type=float, help="Seconds allowed per item (default: HABITAT_ITEM_TIMEOUT)")
+    run_parser.add_argument("--run-timeout", type=float, help="Seconds allowed for the whole run (default: HABITAT_RUN_TIMEOUT)")
+    run_parser.add_argument("--mirror", action="append", default=[], dest="mirrors", help=mirror_help)
+
+    args = parser.parse_args()
+
+    if args.command in ("run", "prefetch"):
+        try:
+            mirrors = dict(cache.parse_mirror(spec) for spec in args.mirrors)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.command == "run":
+        try:
+            targets = [executors.parse_target(spec) for spec in args.targets]
+        except ValueError as e:
+            parser.error(str(e))
+        if len(targets) > 1:
+            executor = executors.FanOutExecutor(targets, max_workers=args.jobs)
+        else:
+            executor = executors.LocalExecutor(targets[0]) if targets else None
+        results = run_commands(
+            list(iter_tuples(args.manifest, convert=False)),
+            artifact_cache=cache.ArtifactCache(mirrors=mirrors), executor=executor,
+            item_timeout=args.timeout, run_timeout=args.run_timeout,
+        )
+        failed = any(item.status != "ok" for items in results.values() for item in items)
+        raise SystemExit(1 if failed else 0)
+
+    if args.command == "prefetch":
+        max_bytes = args.max_size_mb * 1024 ** 2 if args.max_size_mb else None
+        artifact_cache = cache.ArtifactCache(root=args.cache_dir, max_bytes=max_bytes, mirrors=mirrors)
+        # Prefetch what the manifest actually says to install, not model output
+        artifact_cache.prefetch(iter_tuples(args.manifest, convert=False))
+        print(f"Cache at {artifact_cache.root} holds {artifact_cache.size() // 1024 ** 2} MB.")
+        return
+
     app = HabitatApp()
     app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
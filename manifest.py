@@ -0,0 +1,218 @@
+import os
+import stat
+import struct
+import tempfile
+import yaml
+
+# libyaml bindings are an order of magnitude faster than the pure-Python
+# emitter/parser; fall back silently when PyYAML was built without them.
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+BINARY_MAGIC = b"HBTM\x01"
+BINARY_EXTENSION = ".hbm"
+
+_U32 = struct.Struct("<I")
+
+
+def split_steps(command):
+    """
+    Splits a " && "-joined command string back into its individual steps.
+
+    Only a top-level '&&' is treated as a separator: one inside single/double
+    quotes, backticks, $(...) or (...) subshells, or backslash-escaped, stays
+    part of its step, so `echo "a && b"` and `echo $(cd x && pwd)` are kept whole.
+    """
+    steps = []
+    current = []
+    # Open contexts, innermost last: "'", '"', "`" or "(" (for both $( and ( )
+    stack = []
+    i = 0
+    while i < len(command):
+        char = command[i]
+        top = stack[-1] if stack else None
+
+        if top == "'":
+            if char == "'":
+                stack.pop()
+        elif char == "\\" and i + 1 < len(command):
+            current.append(command[i:i + 2])
+            i += 2
+            continue
+        elif top == '"':
+            if char == '"':
+                stack.pop()
+            elif char == "`":
+                stack.append("`")
+            elif command.startswith("$(", i):
+                stack.append("(")
+                current.append("$(")
+                i += 2
+                continue
+        elif char == "`" and top == "`":
+            stack.pop()
+        elif char in ("'", '"', "`"):
+            stack.append(char)
+        elif char == "(":
+            stack.append("(")
+        elif char == ")" and top == "(":
+            stack.pop()
+        elif top is None and command.startswith("&&", i):
+            steps.append("".join(current).strip())
+            current = []
+            i += 2
+            continue
+        current.append(char)
+        i += 1
+    steps.append("".join(current).strip())
+    return [step for step in steps if step]
+
+
+def tuples_to_config(tuples_list):
+    """
+    Builds the manifest dictionary for a list of (name, version, command) tuples.
+    Places all items in the "environment" section.
+    """
+    config = {
+        "environment": {}
+    }
+
+    for name, version, command in tuples_list:
+        if isinstance(command, str):
+            command_list = split_steps(command)
+        else:
+            command_list = list(command)
+
+        config["environment"][name] = {
+            "version": version,
+            "install_command": command_list
+        }
+
+    return config
+
+
+def load_yaml(config_path):
+    """Parses a YAML manifest, using libyaml when it is available."""
+    with open(config_path, "r") as file:
+        return yaml.load(file, Loader=SafeLoader)
+
+
+def _target_mode(output_path):
+    try:
+        return stat.S_IMODE(os.stat(output_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write(output_path, data):
+    """
+    Writes bytes to output_path via a temporary file in the same directory and
+    an os.replace(), so readers never observe a half-written manifest.
+    The result keeps an existing file's permissions, or gets the usual
+    umask-based ones when new (mkstemp alone would make it owner-only).
+    """
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".habitat-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, _target_mode(output_path))
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def dump_yaml(tuples_list, output_path):
+    """
+    Atomically writes the tuples as a YAML manifest.
+    Returns the configuration dictionary that was written.
+    """
+    config = tuples_to_config(tuples_list)
+    text = yaml.dump(
+        config, Dumper=SafeDumper, default_flow_style=False, sort_keys=False, allow_unicode=True
+    )
+    atomic_write(output_path, text.encode("utf-8"))
+    return config
+
+
+def _pack_str(value):
+    data = str(value).encode("utf-8")
+    return _U32.pack(len(data)) + data
+
+
+def dump_binary(tuples_list, output_path):
+    """
+    Atomically writes the tuples as a compact, length-prefixed binary manifest.
+
+    Layout: BINARY_MAGIC followed by one record per item until end of file.
+    A record is name, version, a u32 step count and that many steps; every
+    string is a little-endian u32 byte length followed by UTF-8 bytes.
+    """
+    chunks = [BINARY_MAGIC]
+    for name, version, command in tuples_list:
+        steps = split_steps(command) if isinstance(command, str) else list(command)
+        chunks.append(_pack_str(name))
+        chunks.append(_pack_str(version))
+        chunks.append(_U32.pack(len(steps)))
+        chunks.extend(_pack_str(step) for step in steps)
+    atomic_write(output_path, b"".join(chunks))
+
+
+def iter_binary(input_path):
+    """
+    Yields (name, version, command) tuples from a binary manifest written by dump_binary.
+    """
+    with open(input_path, "rb") as file:
+        data = file.read()
+
+    if not data.startswith(BINARY_MAGIC):
+        raise ValueError("Invalid binary manifest format.")
+
+    unpack_u32 = _U32.unpack_from
+    offset = len(BINARY_MAGIC)
+    end = len(data)
+
+    def read_str():
+        nonlocal offset
+        (length,) = unpack_u32(data, offset)
+        start = offset + 4
+        offset = start + length
+        if offset > end:
+            raise ValueError("Truncated binary manifest.")
+        return data[start:offset].decode("utf-8")
+
+    try:
+        while offset < end:
+            name = read_str()
+            version = read_str()
+            (count,) = unpack_u32(data, offset)
+            offset += 4
+            steps = [read_str() for _ in range(count)]
+            yield (name, version, " && ".join(steps))
+    except struct.error:
+        raise ValueError("Truncated binary manifest.")
+
+
+def load_binary(input_path):
+    """Returns the list of (name, version, command) tuples stored in a binary manifest."""
+    return list(iter_binary(input_path))
+
+
+def is_binary_manifest(path):
+    return path.lower().endswith(BINARY_EXTENSION)
+
+
+def export_manifest(tuples_list, output_path):
+    """Writes the tuples to output_path, choosing the format from its extension."""
+    if is_binary_manifest(output_path):
+        dump_binary(tuples_list, output_path)
+    else:
+        dump_yaml(tuples_list, output_path)
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+
+
+class PrefetchCommandsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = cache.ArtifactCache(root=self.tmp.name, preserve_sudo_env=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_translates_installs_and_skips_other_steps(self):
+        command = (
+            "sudo apt-get update && sudo apt-get install -y curl git"
+            " && python3 -m pip install -i https://idx requests==2.31 -r req.txt"
+            " && npm install -g left-pad && brew install --cask firefox && echo done"
+        )
+        self.assertEqual(self.cache.prefetch_commands(command), [
+            "sudo apt-get install --download-only -y curl git",
+            f"pip download --dest {self.cache.wheelhouse} -r req.txt requests==2.31",
+            "npm cache add left-pad",
+            "brew fetch --cask firefox",
+        ])
+
+    def test_sudo_keeps_cache_env_only_when_enabled(self):
+        self.assertEqual(self.cache.wrap_command("sudo pip install x"), "sudo pip install x")
+
+        self.cache.preserve_sudo_env = True
+        wrapped = self.cache.wrap_command("sudo pip install x && ls")
+        self.assertTrue(wrapped.startswith("sudo --preserve-env=APT_CONFIG,"))
+        self.assertTrue(wrapped.endswith(" pip install x && ls"))
+
+
+class MirrorTest(unittest.TestCase):
+    def test_env_vars_are_defaults_and_explicit_mirrors_win(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {
+            "HABITAT_PIP_MIRROR": "https://pip.env", "HABITAT_NPM_MIRROR": "https://npm.env",
+        }):
+            env = cache.ArtifactCache(root=tmp, mirrors={"pip": "https://pip.cli"}).env({})
+        self.assertEqual(env["PIP_INDEX_URL"], "https://pip.cli")
+        self.assertEqual(env["npm_config_registry"], "https://npm.env")
+        self.assertNotIn("HOMEBREW_BOTTLE_DOMAIN", env)
+
+    def test_parse_mirror(self):
+        self.assertEqual(cache.parse_mirror("PIP=https://x/simple"), ("pip", "https://x/simple"))
+        for spec in ("pip", "pip=", "apt=https://x"):
+            with self.assertRaises(ValueError):
+                cache.parse_mirror(spec)
+
+
+class PruneTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = cache.ArtifactCache(root=self.tmp.name)
+        self.cache.ensure_dirs()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, size, used):
+        with open(path, "wb") as file:
+            file.write(b"x" * size)
+        os.utime(path, (used, used))
+        return path
+
+    def test_removes_least_recently_used_first(self):
+        oldest = self.write(os.path.join(self.cache.pip_dir, "a"), 100, 1000)
+        middle = self.write(os.path.join(self.cache.npm_dir, "b"), 100, 2000)
+        newest = self.write(os.path.join(self.cache.wheelhouse, "c"), 100, 3000)
+
+        self.assertEqual(self.cache.prune(max_bytes=150), 200)
+        self.assertFalse(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(middle))
+        self.assertTrue(os.path.exists(newest))
+        self.assertEqual(self.cache.size(), 100)
+
+    def test_only_touches_managed_dirs(self):
+        deb = self.write(os.path.join(self.cache.apt_dir, "pkg.deb"), 100, 1)
+        generated = self.write(os.path.join(self.tmp.name, "generate.json"), 100, 1)
+        wheel = self.write(os.path.join(self.cache.wheelhouse, "w.whl"), 100, 5000)
+
+        self.cache.prune(max_bytes=0)
+        self.assertTrue(os.path.exists(deb))
+        self.assertTrue(os.path.exists(generated))
+        self.assertFalse(os.path.exists(wheel))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import contextlib
+import io
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import executors
+
+
+class FanOutExecutorTest(unittest.TestCase):
+    def test_aggregates_results_per_local_target(self):
+        with tempfile.TemporaryDirectory() as dir_a, tempfile.TemporaryDirectory() as dir_b:
+            targets = [executors.LocalTarget("a", dir_a), executors.LocalTarget("b", dir_b)]
+            cart = [
+                ("where", "1", "pwd"),
+                ("broken", "1", "exit 3"),
+                ("empty", "1", ""),
+            ]
+
+            results = executors.FanOutExecutor(targets, max_workers=2).run_cart(cart)
+
+            self.assertEqual(list(results), ["a", "b"])
+            for name, directory in (("a", dir_a), ("b", dir_b)):
+                where, broken = results[name]
+                self.assertEqual(where.status, "ok")
+                self.assertEqual(os.path.realpath(where.stdout.strip()), os.path.realpath(directory))
+                self.assertEqual((broken.status, broken.returncode), ("failed", 3))
+            self.assertEqual(executors.summarize(results), {"a": (1, 1), "b": (1, 1)})
+
+    def test_rejects_duplicate_target_names(self):
+        with self.assertRaises(ValueError):
+            executors.FanOutExecutor([executors.LocalTarget("x"), executors.LocalTarget("x")])
+
+    def test_prefixes_every_output_line_with_the_target(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            executors.LocalExecutor(executors.LocalTarget("box")).run_cart(
+                [("two", "1", "echo one; echo two"), ("bad", "1", "echo oops >&2; exit 1")]
+            )
+        lines = output.getvalue().splitlines()
+        self.assertIn("[box] one", lines)
+        self.assertIn("[box] two", lines)
+        self.assertIn("[box] oops", lines)
+        self.assertTrue(all(line.startswith("[box] ") for line in lines))
+
+    def test_base_classes_are_abstract(self):
+        with self.assertRaises(TypeError):
+            executors.Target("x")
+        with self.assertRaises(TypeError):
+            executors.Executor()
+
+
+if __name__ == "__main__":
+    unittest.main()
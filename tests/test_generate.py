@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import ollama  # noqa: F401
+except ImportError:
+    # The model is always stubbed below; only the module has to exist
+    sys.modules["ollama"] = types.ModuleType("ollama")
+
+import generate
+
+
+def _reply(content):
+    return {"message": {"content": content}}
+
+
+class ParseCommandsTest(unittest.TestCase):
+    def test_keeps_normalized_unique_dollar_lines(self):
+        content = (
+            "Here you go:\n"
+            "$ pip install requests==2.31;\n"
+            "  $   pip  install   requests==2.31  \n"
+            "1. not a command\n"
+            "$ pip install urllib3\n"
+            "$ \n"
+        )
+        self.assertEqual(
+            generate.parse_commands(content),
+            ["pip install requests==2.31", "pip install urllib3"],
+        )
+
+
+class ValidateCommandsTest(unittest.TestCase):
+    def test_rejects_bad_commands(self):
+        self.assertIsNotNone(generate.validate_commands([], "pip"))
+        self.assertIn("unbalanced", generate.validate_commands(["pip install 'x"], "pip"))
+        self.assertIn("placeholder", generate.validate_commands(["pip install <package>"], "pip"))
+        self.assertIn("does not use", generate.validate_commands(["npm install x"], "pip"))
+
+    def test_accepts_aliases_sudo_options_and_manager_spellings(self):
+        for command, manager in [
+            ("sudo -H pip install x", "pip"),
+            ("sudo -u root -E PIP_NO_CACHE_DIR=1 python3 -m pip install x", "Pip3"),
+            ("brew install x", "Homebrew"),
+            ("choco install x", "Chocolatey"),
+            ("sudo apt-get install -y x", "APT"),
+            ("winget install x", "any package manager"),
+        ]:
+            self.assertIsNone(generate.validate_commands([command], manager), command)
+        self.assertIsNotNone(generate.validate_commands(["sudo -u pip ls"], "pip"))
+        self.assertEqual(generate.normalize_manager(" HomeBrew "), "brew")
+
+
+class GenerateInstallCommandsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(os.environ, {"HABITAT_CACHE_DIR": self.tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def chat(self, *replies):
+        patcher = mock.patch.object(
+            generate.ollama, "chat", create=True, side_effect=[_reply(r) for r in replies]
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_retries_with_feedback(self):
+        chat = self.chat("Sure! npm install requests", "$ pip install requests==2.31")
+        commands = generate.generate_install_commands("linux", "requests", "pip", "2.31")
+
+        self.assertEqual(commands, ["pip install requests==2.31"])
+        self.assertEqual(chat.call_count, 2)
+        retry_prompt = chat.call_args.kwargs["messages"][0]["content"]
+        self.assertIn("rejected because it contained no '$ ' commands", retry_prompt)
+
+    def test_caches_accepted_answers(self):
+        chat = self.chat("$ brew install jq")
+        first = generate.generate_install_commands("darwin", "jq", "brew", "latest")
+        # Same request spelled differently is served from the cache
+        second = generate.generate_install_commands("darwin", "JQ", "Homebrew", "latest")
+
+        self.assertEqual(first, second)
+        self.assertEqual(chat.call_count, 1)
+
+    def test_caches_failures_until_they_expire(self):
+        chat = self.chat(*["no commands"] * 3, "$ pip install x")
+        with self.assertRaises(generate.GenerationError):
+            generate.generate_install_commands("linux", "x", "pip", "1", max_attempts=3)
+        with self.assertRaises(generate.GenerationError):
+            generate.generate_install_commands("linux", "x", "pip", "1")
+        self.assertEqual(chat.call_count, 3)
+
+        later = time.time() + generate.NEGATIVE_TTL + 1
+        with mock.patch.object(generate.time, "time", return_value=later):
+            commands = generate.generate_install_commands("linux", "x", "pip", "1")
+        self.assertEqual(commands, ["pip install x"])
+        self.assertEqual(chat.call_count, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import manifest
+
+
+ITEMS = [
+    ("python", "3.10", 'sudo apt install python3.10 && echo "a && b"'),
+    ("tool", "latest", "echo $(cd /tmp && pwd) && echo `true && echo x` && (cd /tmp && ls)"),
+    ("escaped", "1", "echo 'q&&r' && echo a\\&\\&b"),
+    ("empty", "1", ""),
+]
+
+
+class SplitStepsTest(unittest.TestCase):
+    def test_splits_only_top_level_and(self):
+        self.assertEqual(manifest.split_steps("a && b&&c"), ["a", "b", "c"])
+        self.assertEqual(manifest.split_steps('echo "a && b" && c'), ['echo "a && b"', "c"])
+        self.assertEqual(manifest.split_steps("echo $(cd x && pwd)"), ["echo $(cd x && pwd)"])
+        self.assertEqual(manifest.split_steps('echo "$(cd x && pwd)" && y'), ['echo "$(cd x && pwd)"', "y"])
+        self.assertEqual(manifest.split_steps("echo `a && b` && c"), ["echo `a && b`", "c"])
+        self.assertEqual(manifest.split_steps("(cd x && make) && y"), ["(cd x && make)", "y"])
+        self.assertEqual(manifest.split_steps("echo 'it\\\\' && y"), ["echo 'it\\\\'", "y"])
+        self.assertEqual(manifest.split_steps(""), [])
+
+
+class RoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_yaml_round_trip_is_exact(self):
+        manifest.dump_yaml(ITEMS, self.path("m.yaml"))
+        config = manifest.load_yaml(self.path("m.yaml"))
+        loaded = [
+            (name, details["version"], " && ".join(details["install_command"]))
+            for name, details in config["environment"].items()
+        ]
+        self.assertEqual(loaded, ITEMS)
+
+    def test_binary_round_trip_is_exact(self):
+        manifest.export_manifest(ITEMS, self.path("m.hbm"))
+        self.assertEqual(manifest.load_binary(self.path("m.hbm")), ITEMS)
+
+    def test_binary_rejects_bad_and_truncated_files(self):
+        manifest.dump_binary(ITEMS, self.path("m.hbm"))
+        with open(self.path("m.hbm"), "rb") as file:
+            data = file.read()
+
+        with open(self.path("bad.hbm"), "wb") as file:
+            file.write(b"not a manifest")
+        with self.assertRaises(ValueError):
+            manifest.load_binary(self.path("bad.hbm"))
+
+        for cut in (len(manifest.BINARY_MAGIC) + 2, len(data) - 3):
+            with open(self.path("cut.hbm"), "wb") as file:
+                file.write(data[:cut])
+            with self.assertRaises(ValueError):
+                manifest.load_binary(self.path("cut.hbm"))
+
+
+@unittest.skipIf(os.name == "nt", "POSIX file modes")
+class AtomicWriteTest(unittest.TestCase):
+    def test_new_file_gets_umask_mode_and_existing_mode_is_kept(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "habitat.yaml")
+            umask = os.umask(0o022)
+            try:
+                manifest.atomic_write(path, b"one")
+            finally:
+                os.umask(umask)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+            os.chmod(path, 0o640)
+            manifest.atomic_write(path, b"two")
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), b"two")
+            self.assertEqual(os.listdir(tmp), ["habitat.yaml"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import executors
+
+
+def _alive(pid):
+    """Whether pid is running and not a zombie (unreaped zombies are common in containers)."""
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            return file.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+class ShellAsRemoteTarget(executors.RemoteTarget):
+    """Runs the 'remote' side through a local shell so the remote kill path can be checked."""
+
+    def __init__(self):
+        super().__init__("fake-remote")
+
+    def argv(self, command):
+        return ["/bin/sh", "-c", command]
+
+
+class InterruptedTarget(executors.LocalTarget):
+    """Stands in for Ctrl-C arriving while a fan-out run is in progress."""
+
+    def run(self, command, env=None, timeout=None, cancel_event=None):
+        time.sleep(0.3)
+        raise KeyboardInterrupt
+
+
+@unittest.skipUnless(os.path.isdir("/proc/self"), "needs a POSIX shell and /proc")
+class TimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.child_pidfile = os.path.join(self.tmp.name, "child.pid")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _child_pid(self):
+        with open(self.child_pidfile) as file:
+            return int(file.read())
+
+    def test_timeout_does_not_wait_for_children_holding_pipes(self):
+        start = time.monotonic()
+        with self.assertRaises(executors.CommandTimeout):
+            executors.LocalTarget().run("sleep 8 & echo hi", timeout=1)
+        self.assertLess(time.monotonic() - start, 3)
+
+    def test_timeout_kills_background_children(self):
+        command = f"sleep 30 & echo $! > {self.child_pidfile}; wait"
+        with self.assertRaises(executors.CommandTimeout):
+            executors.LocalTarget().run(command, timeout=1)
+        self.assertFalse(_alive(self._child_pid()))
+
+    def test_cancel_stops_running_command(self):
+        cancel_event = threading.Event()
+        threading.Timer(0.3, cancel_event.set).start()
+        start = time.monotonic()
+        with self.assertRaises(executors.CommandCancelled):
+            executors.LocalTarget().run("sleep 30", cancel_event=cancel_event)
+        self.assertLess(time.monotonic() - start, 3)
+
+    def test_run_deadline_skips_remaining_items(self):
+        cart = [("slow", "1", "sleep 30"), ("next", "1", "echo never")]
+        results = executors.LocalExecutor().run_cart(cart, run_timeout=0.5)
+        self.assertEqual([item.status for item in results["local"]], ["timeout", "timeout"])
+
+    def test_remote_target_kills_command_on_target(self):
+        command = f"sleep 30 & echo $! > {self.child_pidfile}; wait"
+        with self.assertRaises(executors.CommandTimeout):
+            ShellAsRemoteTarget().run(command, timeout=1)
+        self.assertFalse(_alive(self._child_pid()))
+
+    def test_fan_out_interrupt_cancels_other_targets(self):
+        targets = [InterruptedTarget("interrupted"), executors.LocalTarget("slow")]
+        cart = [("slow", "1", f"sleep 30 & echo $! > {self.child_pidfile}; wait")]
+        start = time.monotonic()
+        with self.assertRaises(KeyboardInterrupt):
+            executors.FanOutExecutor(targets, max_workers=2).run_cart(cart)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertFalse(_alive(self._child_pid()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import watch
+
+
+def _entries(path):
+    with open(path) as file:
+        for line in file.read().split():
+            section, _, entry = line.rpartition(":")
+            name, _, command = entry.partition("=")
+            yield section or None, name, command
+
+
+class ManifestSyncTest(unittest.TestCase):
+    def test_diff_only_normalizes_added_and_changed_entries(self):
+        normalized = []
+
+        def normalize(name, raw):
+            normalized.append(name)
+            return (name, "latest", raw)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest")
+            with open(path, "w") as file:
+                file.write("a=1 b=1 c=1")
+            sync = watch.ManifestSync(_entries, normalize)
+            list(sync.iter_load(path))
+
+            with open(path, "w") as file:
+                file.write("a=1 b=2 d=1")
+            normalized.clear()
+            diff = sync.diff(path)
+
+        self.assertEqual(diff.added, [("d", "latest", "1")])
+        self.assertEqual(diff.removed, [("c", "latest", "1")])
+        self.assertEqual(diff.changed, [(("b", "latest", "1"), ("b", "latest", "2"))])
+        self.assertEqual(sorted(normalized), ["b", "d"])
+
+
+    def test_same_name_in_two_sections_is_tracked_separately(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest")
+            with open(path, "w") as file:
+                file.write("env:node=1 dev:node=1")
+            sync = watch.ManifestSync(_entries, lambda name, raw: (name, "latest", raw))
+            self.assertEqual(len(list(sync.iter_load(path))), 2)
+
+            with open(path, "w") as file:
+                file.write("env:node=1 dev:node=2")
+            diff = sync.diff(path)
+            self.assertEqual(diff, ([], [], [(("node", "latest", "1"), ("node", "latest", "2"))]))
+
+            with open(path, "w") as file:
+                file.write("env:node=1 env:node=3")
+            with self.assertRaises(ValueError):
+                sync.diff(path)
+            # The rejected file leaves the baseline alone
+            self.assertEqual(sorted(sync.state), [("dev", "node"), ("env", "node")])
+
+
+class ManifestWatcherTest(unittest.TestCase):
+    def _watch(self, tmp, on_change, **kwargs):
+        path = os.path.join(tmp, "manifest")
+        with open(path, "w") as file:
+            file.write("a=1")
+        watcher = watch.ManifestWatcher(path, on_change, interval=0.05, debounce=0.01, **kwargs)
+        watcher.start()
+        return path, watcher
+
+    def test_stop_can_wait_for_in_flight_change(self):
+        started, finished = threading.Event(), threading.Event()
+
+        def on_change():
+            started.set()
+            time.sleep(0.3)
+            finished.set()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path, watcher = self._watch(tmp, on_change)
+            with open(path, "w") as file:
+                file.write("a=22")
+            self.assertTrue(started.wait(5))
+            watcher.stop()
+
+        self.assertTrue(finished.is_set())
+
+    def test_stop_without_wait_returns_immediately(self):
+        started, release = threading.Event(), threading.Event()
+
+        def on_change():
+            started.set()
+            release.wait(5)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            _, watcher = self._watch(tmp, on_change, check_on_start=True)
+            # check_on_start calls on_change() without any change on disk
+            self.assertTrue(started.wait(5))
+            start = time.monotonic()
+            watcher.stop(wait=False)
+            self.assertLess(time.monotonic() - start, 0.2)
+            release.set()
+            watcher.thread.join(5)
+            self.assertFalse(watcher.thread.is_alive())
+
+if __name__ == "__main__":
+    unittest.main()
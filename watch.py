@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+
+# inotify/FSEvents/ReadDirectoryChangesW through watchdog when it is installed;
+# otherwise the watcher falls back to polling the file's stat.
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# added: [item], removed: [item], changed: [(old item, new item)]
+ManifestDiff = namedtuple("ManifestDiff", ["added", "removed", "changed"])
+
+
+class ManifestSync:
+    """
+    Remembers what was imported from a manifest so later versions of the file
+    can be applied as a per-entry diff.
+
+    entries(path) yields (section, name, raw) triples straight from the file
+    and normalize(name, raw) turns one into a (name, version, command) tuple.
+    Entries are identified by (section, name), so the same name may appear in
+    several sections, and a file repeating one is rejected with ValueError.
+    They are compared by a hash of their raw content, so unchanged entries
+    are never normalized (or sent for command generation) again.
+    """
+
+    def __init__(self, entries, normalize):
+        self.entries = entries
+        self.normalize = normalize
+        self.state = {}  # (section, name) -> (digest, imported item)
+        # A stopped watcher may still be finishing a diff when the next one starts
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def digest(raw):
+        return hashlib.sha256(json.dumps(raw, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _keyed_entries(self, path):
+        seen = set()
+        for section, name, raw in self.entries(path):
+            key = (section, name)
+            if key in seen:
+                where = f" in {section}" if section else ""
+                raise ValueError(f"Duplicate manifest entry '{name}'{where}")
+            seen.add(key)
+            yield key, name, raw
+
+    def iter_load(self, path):
+        """Yields every normalized item in path, recording it as the new baseline."""
+        self.state = {}
+        for key, name, raw in self._keyed_entries(path):
+            item = self.normalize(name, raw)
+            self.state[key] = (self.digest(raw), item)
+            yield item
+
+    def diff(self, path):
+        """
+        Re-reads path and returns the ManifestDiff against the last baseline,
+        which is then replaced. If the file cannot be parsed the baseline is
+        left untouched and the error propagates.
+        """
+        with self.lock:
+            raw_entries = list(self._keyed_entries(path))
+
+            new_state = {}
+            added, changed = [], []
+            for key, name, raw in raw_entries:
+                digest = self.digest(raw)
+                old = self.state.get(key)
+                if old and old[0] == digest:
+                    new_state[key] = old
+                    continue
+                item = self.normalize(name, raw)
+                new_state[key] = (digest, item)
+                if old:
+                    changed.append((old[1], item))
+                else:
+                    added.append(item)
+
+            removed = [item for key, (_, item) in self.state.items() if key not in new_state]
+            self.state = new_state
+            return ManifestDiff(added, removed, changed)
+
+
+class _DirtyHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = (getattr(event, "src_path", None), getattr(event, "dest_path", None))
+        if any(path and os.path.abspath(path) == self.watcher.path for path in paths):
+            self.watcher.dirty.set()
+
+
+class ManifestWatcher:
+    """
+    Calls on_change() on a background thread whenever the file at path changes.
+
+    Uses watchdog's native observer when available (watching the parent
+    directory, so editors that save by replacing the file are caught) and
+    otherwise polls the file's mtime/size/inode every interval seconds.
+    Bursts of events within debounce seconds trigger a single call. With
+    check_on_start, on_change() is also called once as soon as the thread
+    starts, so changes made before watching began are not missed.
+    """
+
+    def __init__(self, path, on_change, interval=1.0, debounce=0.3, check_on_start=False):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self.check_on_start = check_on_start
+        self.dirty = threading.Event()
+        self.stopped = threading.Event()
+        self.observer = None
+        self.thread = None
+        self.signature = None
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def start(self):
+        self.signature = self._stat_signature()
+        if Observer is not None:
+            self.observer = Observer()
+            self.observer.schedule(_DirtyHandler(self), os.path.dirname(self.path), recursive=False)
+            self.observer.start()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stops watching. With wait=True this also waits for an in-flight
+        on_change() call to finish; with wait=False (e.g. from a GUI thread)
+        it returns at once and the observer and thread are joined in the
+        background.
+        """
+        self.stopped.set()
+        self.dirty.set()
+        if wait:
+            self._join()
+        else:
+            threading.Thread(target=self._join, daemon=True).start()
+
+    def _join(self):
+        observer, self.observer = self.observer, None
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"Error syncing {self.path}: {e}")
+
+    def _loop(self):
+        if self.check_on_start and not self.stopped.is_set():
+            self._notify()
+        while not self.stopped.is_set():
+            triggered = self.dirty.wait(self.interval)
+            if self.stopped.is_set():
+                break
+
+            signature = self._stat_signature()
+            if not triggered:
+                # Polling fallback (and a safety net for missed native events)
+                if signature == self.signature:
+                    continue
+            else:
+                # Let the editor finish writing before reading the file
+                if self.stopped.wait(self.debounce):
+                    break
+                self.dirty.clear()
+                signature = self._stat_signature()
+
+            self.signature = signature
+            if signature is None:
+                continue  # file is mid-replace or was deleted; wait for it to come back
+            self._notify()